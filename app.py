@@ -1,35 +1,30 @@
+import math
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
+import plotly.io as pio
 import numpy as np
+from core import (
+    program_options, program_column, color_map, PAGE_CSS, static_chart, hover_chart,
+    load_live_data, reload_live_data, load_weight_matrix, load_audit_table, load_radar_axes, compute_compatibility, remap_scores,
+    new_radar_figure, new_comparison_figure, new_risk_figure, refresh_traces, floor_plate_svg,
+)
 
-# -- 1. LIVE DATA CONNECTION --
-SHEET_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vS1UOhKUDHJP2tWaAOL0E9M72g3coDNY5HI_3d6DA37Gf4lznsxWBl9WyY25-tDhrTivb76BrZwdqKI/pub?output=csv"
-
-@st.cache_data(ttl=10)
-def load_live_data():
-    try:
-        df = pd.read_csv(SHEET_URL)
-        df.columns = [c.strip() for c in df.columns]
-        return df
-    except Exception as e:
-        st.error(f"Connection Error: {e}")
-        return pd.DataFrame()
+# orjson encodes figures (and their NumPy arrays) in C instead of the stdlib json encoder
+pio.json.config.default_engine = 'orjson'
 
+# -- 1. LIVE DATA CONNECTION --
 df = load_live_data()
 
-# -- 2. TYPOLOGY CONFIG --
-program_options = ["Housing", "Education", "Lab", "Data Center"]
-color_map = {"Housing": "#2E7D32", "Education": "#FBC02D", "Lab": "#E03C31", "Data Center": "#1565C0"}
-
-# Initialize criteria to 0 for a clean start
+# -- 2. SESSION STATE --
+# Initialize criteria to 0 for a clean start: one (criteria x typology) int8 score matrix, rows in memory_criteria order
 if 'program_memory' not in st.session_state:
-    if not df.empty:
-        st.session_state.program_memory = {p: {row['Criterion']: 0 for _, row in df.iterrows()} for p in program_options}
-    else:
-        st.session_state.program_memory = {p: {} for p in program_options}
+    st.session_state.program_memory = np.zeros((0, len(program_options)), dtype=np.int8)
+    st.session_state.memory_criteria, st.session_state.audit_epoch = np.array([], dtype=object), 0
+
+# The live sheet can change under a session: remap scores by criterion name instead of trusting row positions
+if not df.empty and not np.array_equal(st.session_state.memory_criteria, df['Criterion'].to_numpy()):
+    st.session_state.program_memory = remap_scores(st.session_state.program_memory, st.session_state.memory_criteria, df['Criterion'].to_numpy())
+    st.session_state.memory_criteria = df['Criterion'].to_numpy()
+    st.session_state.audit_epoch += 1  # New editor key, so pending positional edits from the old row order are dropped
 
 if 'building_dims' not in st.session_state:
     st.session_state.building_dims = {"sft": 100000, "stories": 5}
@@ -37,25 +32,13 @@ if 'building_dims' not in st.session_state:
 # -- 3. PAGE CONFIG & DYNAMIC UI STYLING --
 st.set_page_config(page_title="Gensler | Adaptavolve", layout="wide")
 
-st.markdown("""
-    <style>
-    /* Dynamic text color for Light/Dark mode readability */
-    [data-testid="stSidebar"] h2, [data-testid="stSidebar"] label p {
-        font-size: 1.25rem !important;
-        font-weight: 600 !important;
-        color: var(--text-color) !important;
-    }
-    h1 { color: #E03C31; font-weight: 800; }
-    .stButton>button { width: 100%; background-color: #E03C31; color: white; border: none; border-radius: 5px; height: 3em;}
-    /* Final Result Box Styling */
-    .final-result { padding: 20px; border-radius: 10px; border-left: 5px solid #E03C31; background-color: var(--secondary-background-color); margin-top: 20px; color: var(--text-color); }
-    </style>
-    """, unsafe_allow_html=True)
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 st.title("Gensler Adaptable Building Chassis | Adaptavolve")
 
 if not df.empty:
     # -- 4. SIDEBAR --
+    st.sidebar.button("🔄 Refresh Data", on_click=reload_live_data)
     st.sidebar.header("Building Scale") 
     with st.sidebar.form("input_form"):
         sft_input = st.number_input("Total SFT", value=st.session_state.building_dims["sft"], step=5000)
@@ -70,39 +53,65 @@ if not df.empty:
     st.sidebar.markdown("---")
     target_program = st.sidebar.selectbox("Target Typology", program_options)
     
-    # Audit Sliders
-    for cat in df['Category'].unique():
-        with st.sidebar.expander(f"📍 {cat}", expanded=False):
-            cat_group = df[df['Category'] == cat]
-            for _, row in cat_group.iterrows():
-                key = f"{target_program}_{row['Criterion']}"
-                current_val = st.session_state.program_memory[target_program].get(row['Criterion'], 0)
-                st.session_state.program_memory[target_program][row['Criterion']] = st.slider(
-                    row['Criterion'], 0, 5, value=current_val, key=key, help=str(row['Scoring Notes (0-5)'])
-                )
+    # Audit table (one data_editor in a form: one widget regardless of criteria count, one rerun per Apply)
+    def apply_audit(program, editor_key):
+        # Runs once on submit, before the rerun: copy only the edited ratings into memory
+        memory = st.session_state.program_memory[:, program_column[program]]
+        for row, changes in st.session_state[editor_key]["edited_rows"].items():
+            if "Rating" in changes:
+                memory[int(row)] = changes["Rating"] or 0
+
+    editor_key = f"audit_{target_program}_{st.session_state.audit_epoch}"
+    with st.sidebar.form("audit_form"):
+        st.data_editor(
+            load_audit_table(df).assign(Rating=st.session_state.program_memory[:, program_column[target_program]]),
+            key=editor_key, hide_index=True, height=400,
+            column_order=['Category', 'Criterion', 'Rating', 'Scoring Notes (0-5)'],
+            disabled=['Category', 'Criterion', 'Scoring Notes (0-5)'],
+            column_config={
+                'Rating': st.column_config.NumberColumn(min_value=0, max_value=5, step=1),
+                'Scoring Notes (0-5)': st.column_config.TextColumn('Scoring Notes'),
+            },
+        )
+        st.form_submit_button("✅ Apply Audit", on_click=apply_audit, args=(target_program, editor_key))
 
     # -- 5. MATH ENGINE --
-    comparison_data = [{"Typology": p, "Compatibility": (pd.Series(df['Criterion'].map(st.session_state.program_memory[p])).fillna(0) / 5 * df[f"{p} Weight"]).sum()} for p in program_options]
-    comp_df = pd.DataFrame(comparison_data).sort_values("Compatibility", ascending=False)
-    current_score = comp_df[comp_df['Typology'] == target_program]['Compatibility'].values[0]
-    best_alt = comp_df[comp_df['Typology'] != target_program].iloc[0]
+    criteria = df['Criterion'].to_numpy()
+    compat_arr = compute_compatibility(st.session_state.program_memory, load_weight_matrix(df))
+    ranking = np.argsort(-compat_arr, kind='stable')
+    ranked_typologies, ranked_compat = [program_options[i] for i in ranking], compat_arr[ranking]
+    compat = dict(zip(program_options, compat_arr))
+    best_alt = max((p for p in program_options if p != target_program), key=compat.__getitem__)
 
     # -- 6. LAYOUT TABS --
     tab1, tab2, tab3 = st.tabs(["📊 Performance Dashboard", "📐 Plan Generator", "✨ AI Interior Render"])
 
     with tab1:
-        st.markdown(f"### Current {target_program} Index: **{current_score:.1f}%**")
+        radar_rows, radar_theta = load_radar_axes(df, target_program)
+        mem = st.session_state.program_memory[:, program_column[target_program]]  # This typology's scores (a view, no copy)
+        st.markdown(f"### Current {target_program} Index: **{compat[target_program]:.1f}%**")
         
         # Side-by-side charts
         col_c1, col_c2 = st.columns([1, 1.2])
+        # Figures are built once per session and only their trace data is updated on rerun
         with col_c1:
-            fig_radar = go.Figure(data=go.Scatterpolar(r=list(st.session_state.program_memory[target_program].values()), theta=list(st.session_state.program_memory[target_program].keys()), fill='toself', line_color=color_map[target_program]))
-            fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 5])), paper_bgcolor='rgba(0,0,0,0)', font=dict(color="gray"), height=450)
-            st.plotly_chart(fig_radar, use_container_width=True)
+            if 'fig_radar' not in st.session_state:
+                st.session_state.fig_radar = new_radar_figure()
+            radar_r = mem[radar_rows]
+            fig_radar = refresh_traces(
+                'fig_radar', (target_program, radar_r.tobytes(), tuple(radar_theta)),
+                r=radar_r, theta=radar_theta, line_color=color_map[target_program],
+            )
+            st.plotly_chart(fig_radar, use_container_width=True, config=hover_chart, key="radar_chart")
         with col_c2:
-            fig_matrix = px.bar(comp_df, x='Typology', y='Compatibility', color='Typology', color_discrete_map=color_map, text_auto='.1f', title="Portfolio Comparison Matrix")
-            fig_matrix.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', height=450)
-            st.plotly_chart(fig_matrix, use_container_width=True)
+            if 'fig_matrix' not in st.session_state:
+                st.session_state.fig_matrix = new_comparison_figure()
+            # float32 array straight from the math engine: Plotly encodes it as one typed buffer
+            fig_matrix = refresh_traces(
+                'fig_matrix', (tuple(ranked_typologies), ranked_compat.tobytes()),
+                x=ranked_typologies, y=ranked_compat, marker_color=[color_map[p] for p in ranked_typologies],
+            )
+            st.plotly_chart(fig_matrix, use_container_width=True, config=static_chart, key="comp_bar")
 
         st.markdown("---")
 
@@ -113,47 +122,59 @@ if not df.empty:
         st.markdown(f"""
         <div class="final-result">
             <h4 style="margin-top:0;">💡 Smart Conversion Recommendation</h4>
-            <p>Based on your current building chassis, your <b>{target_program}</b> design is highly adaptable for <b>{best_alt['Typology']}</b> with a <b>{best_alt['Compatibility']:.1f}%</b> compatibility rating.</p>
+            <p>Based on your current building chassis, your <b>{target_program}</b> design is highly adaptable for <b>{best_alt}</b> with a <b>{compat[best_alt]:.1f}%</b> compatibility rating.</p>
             <p style="font-size: 0.9rem; font-style: italic;">This pivot requires the least invasive structural intervention.</p>
         </div>
         """, unsafe_allow_html=True)
         
         # FINANCIAL RISK LOGIC: Now starts at 0 if no audit is done
-        any_audit_done = any(v > 0 for v in st.session_state.program_memory[target_program].values())
+        any_audit_done = mem.any()
         
-        if any_audit_done:
-            risk_data = [{"Criterion": k, "Impact": (5 - v) * 20} for k, v in st.session_state.program_memory[target_program].items()]
-        else:
-            # Clean start: Risk is 0 until audit begins
-            risk_data = [{"Criterion": k, "Impact": 0} for k, v in st.session_state.program_memory[target_program].items()]
-            
-        risk_df = pd.DataFrame(risk_data).sort_values("Impact", ascending=False).head(5)
+        # Clean start: Risk is 0 until audit begins (one pass, no separate zero-fill branch)
+        impact = (5 - mem.astype(np.int16)) * (20 if any_audit_done else 0)
+
+        # Top-5 by impact without a full sort; ties keep sheet order
+        rank_key = impact.astype(np.int64) * len(impact) - np.arange(len(impact))
+        top_idx = np.argpartition(-rank_key, min(5, len(impact)) - 1)[:5]
+        top_idx = top_idx[np.argsort(-rank_key[top_idx])]
+        top_criteria, top_impact = criteria[top_idx], impact[top_idx]
         
         st.markdown(f"#### 🚩 Top Financial Risks for {target_program}")
-        fig_risk = px.bar(risk_df, y='Criterion', x='Impact', orientation='h', color='Impact', color_continuous_scale='Blues', range_x=[0, 105])
+        if 'fig_risk' not in st.session_state:
+            st.session_state.fig_risk = new_risk_figure()
         
         # Highlight top risk in Red
         if any_audit_done:
-            fig_risk.update_traces(marker_color=['#E03C31' if i == risk_df['Impact'].max() and i > 0 else '#3498db' for i in risk_df['Impact']])
-        
-        fig_risk.update_layout(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', showlegend=False)
-        st.plotly_chart(fig_risk, use_container_width=True)
+            risk_colors = np.where((top_impact == top_impact.max()) & (top_impact > 0), '#E03C31', '#3498db').tolist()
+        else:
+            risk_colors = top_impact
+        fig_risk = refresh_traces(
+            'fig_risk', (any_audit_done, top_impact.tobytes(), tuple(top_criteria)),
+            x=top_impact, y=top_criteria, marker_color=risk_colors,
+        )
+        st.plotly_chart(fig_risk, use_container_width=True, config=static_chart, key="risk_bar")
 
     with tab2:
         st.header("📐 Generative Floor Plate")
         footprint = st.session_state.building_dims["sft"] / st.session_state.building_dims["stories"]
-        side_dim = int(np.sqrt(footprint))
-        fig, ax = plt.subplots(figsize=(5,5))
-        ax.set_facecolor('#f4f7f6')
-        ax.add_patch(plt.Rectangle((0,0), side_dim, side_dim, color=color_map[target_program], alpha=0.2))
-        core_size = max(20, side_dim * 0.15)
-        ax.add_patch(plt.Rectangle((side_dim/2 - core_size/2, side_dim/2 - core_size/2), core_size, core_size, color='black'))
-        st.pyplot(fig)
-
-    with tab3:
+        side_dim = math.isqrt(int(footprint))
+        # Reuse this session's SVG while plate size and typology are unchanged (no cache lookup on dashboard-only reruns)
+        plan_signature = (side_dim, target_program)
+        if st.session_state.get("plan_signature") != plan_signature:
+            st.session_state.plan_svg = floor_plate_svg(side_dim, color_map[target_program])
+            st.session_state.plan_signature = plan_signature
+        st.markdown(st.session_state.plan_svg, unsafe_allow_html=True)
+        st.caption(f"{side_dim} ft × {side_dim} ft floor plate")
+
+    # The render button only affects this tab, so clicking it reruns just the fragment
+    @st.fragment
+    def render_interior_tab():
         st.header("✨ AI Interior Rendering")
         if st.button("🚀 Generate High-Fidelity Interior"):
             st.success("Rendering Complete!")
             st.image("https://images.unsplash.com/photo-1512918728675-ed5a9ecdebfd?auto=format&fit=crop&q=80&w=1000")
+
+    with tab3:
+        render_interior_tab()
 else:
     st.error("Connection Error: Check Google Sheet URL.")
@@ -0,0 +1,207 @@
+import csv
+import io
+import threading
+import time
+from pathlib import Path
+import requests
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+# -- TYPOLOGY CONFIG --
+program_options = ["Housing", "Education", "Lab", "Data Center"]
+color_map = {"Housing": "#2E7D32", "Education": "#FBC02D", "Lab": "#E03C31", "Data Center": "#1565C0"}
+weight_columns = [f"{p} Weight" for p in program_options]
+program_column = {p: i for i, p in enumerate(program_options)}  # Column of each typology in the score and weight matrices
+sheet_columns = ["Category", "Criterion", "Scoring Notes (0-5)"] + weight_columns
+
+# -- PAGE STYLING --
+# Built once per process (whitespace collapsed); app.py must still emit it every run or Streamlit drops the <style> element
+PAGE_CSS = " ".join("""
+    <style>
+    /* Dynamic text color for Light/Dark mode readability */
+    [data-testid="stSidebar"] h2, [data-testid="stSidebar"] label p {
+        font-size: 1.25rem !important;
+        font-weight: 600 !important;
+        color: var(--text-color) !important;
+    }
+    h1 { color: #E03C31; font-weight: 800; }
+    .stButton>button { width: 100%; background-color: #E03C31; color: white; border: none; border-radius: 5px; height: 3em;}
+    /* Final Result Box Styling */
+    .final-result { padding: 20px; border-radius: 10px; border-left: 5px solid #E03C31; background-color: var(--secondary-background-color); margin-top: 20px; color: var(--text-color); }
+    </style>
+    """.split())
+
+# -- LIVE DATA CONNECTION --
+SHEET_URL = "https://docs.google.com/spreadsheets/d/e/2PACX-1vS1UOhKUDHJP2tWaAOL0E9M72g3coDNY5HI_3d6DA37Gf4lznsxWBl9WyY25-tDhrTivb76BrZwdqKI/pub?output=csv"
+
+SHEET_REFRESH_SECONDS = 300
+SHEET_SNAPSHOT = Path(__file__).parent / ".streamlit" / "cache" / "sheet.csv"
+RADAR_CRITERIA_PER_CATEGORY = 15
+
+# Returns (df, etag); df is None when the sheet is unchanged since `etag` (HTTP 304)
+def fetch_sheet(session, etag=None):
+    response = session.get(SHEET_URL, headers={"If-None-Match": etag} if etag else None, timeout=10)
+    if response.status_code == 304:
+        return None, etag
+    response.raise_for_status()
+    df, etag = parse_sheet(response.content), response.headers.get("ETag")
+    save_snapshot(response.content, etag)
+    return df, etag
+
+def parse_sheet(raw):
+    # Sheet headers may carry stray spaces, so match the needed columns against the raw header row
+    header = next(csv.reader([raw.split(b"\n", 1)[0].decode("utf-8")]))
+    # Typed schema up front: Category repeats a handful of labels, so store it as codes; weights only need float32
+    column_types = {c: pa.float32() for c in header if c.strip() in weight_columns}
+    column_types.update({c: pa.dictionary(pa.int32(), pa.string()) for c in header if c.strip() == "Category"})
+    table = pa_csv.read_csv(io.BytesIO(raw), convert_options=pa_csv.ConvertOptions(
+        include_columns=[c for c in header if c.strip() in sheet_columns], column_types=column_types,
+    ))
+    df = table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+    df.columns = [c.strip() for c in df.columns]
+    return df[sheet_columns]
+
+# Last good sheet on local disk, so a restarted container can paint before the network round-trip
+def save_snapshot(raw, etag):
+    try:
+        SHEET_SNAPSHOT.parent.mkdir(parents=True, exist_ok=True)
+        SHEET_SNAPSHOT.write_bytes(raw)
+        SHEET_SNAPSHOT.with_suffix(".etag").write_text(etag or "")
+    except OSError:
+        pass  # The snapshot is only a cold-start shortcut
+
+def load_snapshot():
+    return parse_sheet(SHEET_SNAPSHOT.read_bytes()), SHEET_SNAPSHOT.with_suffix(".etag").read_text() or None
+
+# Shared across sessions: reruns read the last fetched sheet and never wait on the network after the first load
+@st.cache_resource
+def sheet_holder():
+    # The pooled HTTP session lives in the holder, so the background refresh thread never calls Streamlit cache functions
+    session = requests.Session()
+    try:
+        # Cold start from the snapshot, marked stale so the first read revalidates it in the background
+        (df, etag), fetched_at = load_snapshot(), float("-inf")
+    except Exception:
+        (df, etag), fetched_at = fetch_sheet(session), time.monotonic()
+    return {"df": df, "etag": etag, "fetched_at": fetched_at, "session": session, "refreshing": threading.Lock()}
+
+# Caller holds holder["refreshing"]; the sheet is swapped only on a 200, and a failed fetch still waits a full interval to retry
+def fetch_into(holder):
+    try:
+        df, holder["etag"] = fetch_sheet(holder["session"], holder["etag"])
+        if df is not None:
+            holder["df"] = df
+    finally:
+        holder["fetched_at"] = time.monotonic()
+
+def refresh_sheet(holder):
+    try:
+        fetch_into(holder)
+    except Exception:
+        pass  # Keep serving the last good sheet; the next stale read retries
+    finally:
+        holder["refreshing"].release()
+
+def load_live_data():
+    try:
+        holder = sheet_holder()
+    except Exception as e:
+        st.error(f"Connection Error: {e}")
+        return pd.DataFrame()
+    if time.monotonic() - holder["fetched_at"] > SHEET_REFRESH_SECONDS and holder["refreshing"].acquire(blocking=False):
+        threading.Thread(target=refresh_sheet, args=(holder,), daemon=True).start()
+    return holder["df"]
+
+# Refresh Data button: fetch now, and replace the shared sheet (and its snapshot) only if the fetch succeeds
+def reload_live_data():
+    try:
+        holder = sheet_holder()
+        if not holder["refreshing"].acquire(blocking=False):
+            with holder["refreshing"]:
+                return  # A background refresh was already fetching; its result is the fresh sheet
+        try:
+            fetch_into(holder)
+        finally:
+            holder["refreshing"].release()
+    except Exception as e:
+        st.error(f"Refresh failed, still showing the last loaded sheet: {e}")
+
+# -- DERIVED LOOKUPS (recomputed only when the sheet changes) --
+@st.cache_data
+def load_weight_matrix(df):
+    return np.nan_to_num(df[weight_columns].to_numpy())
+
+# Read-only columns of the audit table; row i lines up with row i of program_memory
+@st.cache_data
+def load_audit_table(df):
+    return df[['Category', 'Criterion', 'Scoring Notes (0-5)']].reset_index(drop=True)
+
+# Radar shows at most RADAR_CRITERIA_PER_CATEGORY criteria per category, ranked by the plotted typology's own weights; scoring still uses every row
+# Returns the shown row indices and their theta labels per (sheet, typology), so reruns only gather r from memory
+@st.cache_data
+def load_radar_axes(df, program):
+    prominence = load_weight_matrix(df)[:, program_column[program]]
+    mask = np.zeros(len(df), dtype=bool)
+    for rows in df.groupby('Category', sort=False, dropna=False).indices.values():
+        mask[rows[np.argsort(-prominence[rows], kind='stable')[:RADAR_CRITERIA_PER_CATEGORY]]] = True
+    rows = np.flatnonzero(mask)
+    return rows, df['Criterion'].to_numpy()[rows]
+
+# -- MATH ENGINE --
+# Carry each criterion's scores over by name when the live sheet changes; criteria new to the sheet start at 0
+def remap_scores(memory, old_criteria, new_criteria):
+    old_row = {c: i for i, c in enumerate(old_criteria)}
+    rows = np.fromiter((old_row.get(c, -1) for c in new_criteria), dtype=np.intp, count=len(new_criteria))
+    remapped = np.zeros((len(new_criteria), memory.shape[1]), dtype=memory.dtype)
+    remapped[rows >= 0] = memory[rows[rows >= 0]]
+    return remapped
+
+# One einsum over the (criteria x typology) score and weight matrices; a few microseconds, so cheaper than any cache lookup
+def compute_compatibility(scores, weights):
+    return np.einsum('ij,ij->j', scores.astype(np.float32), weights) / 5
+
+# -- CHART BUILDERS --
+transparent_bg = dict(paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)')
+static_chart = {'staticPlot': True, 'displayModeBar': False}  # Read-only summaries skip Plotly.js hover/zoom handlers
+hover_chart = {'displayModeBar': False}  # Interactive charts keep hover but drop the toolbar
+
+# Dashboard skeletons: each session builds these once and then only swaps trace data (they are mutated, so not shared via cache_resource)
+def new_radar_figure():
+    fig = go.Figure(data=go.Scatterpolargl(fill='toself'))
+    # Constant uirevision: Plotly.js keeps the user's polar rotation/legend state when r/theta change
+    fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 5])), **transparent_bg, font=dict(color="gray"), height=450, uirevision='radar')
+    return fig
+
+def new_comparison_figure():
+    fig = go.Figure(go.Bar(texttemplate='%{y:.1f}', textposition='auto'))
+    fig.update_layout(title="Portfolio Comparison Matrix", xaxis_title='Typology', yaxis_title='Compatibility', **transparent_bg, height=450)
+    return fig
+
+def new_risk_figure():
+    fig = go.Figure(go.Bar(orientation='h', marker_colorscale='Blues'))
+    fig.update_layout(xaxis_title='Impact', yaxis_title='Criterion', xaxis_range=[0, 105], **transparent_bg, showlegend=False)
+    return fig
+
+# Plotly validates every property in update_traces, so skip it when a chart's inputs match its last render
+def refresh_traces(fig_key, signature, **trace_data):
+    if st.session_state.get(f"{fig_key}_signature") != signature:
+        st.session_state[fig_key].update_traces(**trace_data)
+        st.session_state[f"{fig_key}_signature"] = signature
+    return st.session_state[fig_key]
+
+# -- PLAN GENERATOR --
+# Inline SVG cached per (plate size, colour): no chart library, just two rects the browser scales to the column width
+@st.cache_data(max_entries=64)
+def floor_plate_svg(side_dim, color):
+    core_size = max(20, side_dim * 0.15)
+    core_min = side_dim/2 - core_size/2
+    return (
+        f'<svg viewBox="0 0 {side_dim} {side_dim}" style="width:100%;max-height:500px;background:#f4f7f6">'
+        f'<rect width="{side_dim}" height="{side_dim}" fill="{color}" fill-opacity="0.2"/>'
+        f'<rect x="{core_min:g}" y="{core_min:g}" width="{core_size:g}" height="{core_size:g}" fill="black"/>'
+        '</svg>'
+    )